@@ -1,22 +1,155 @@
 import os
+import re
+import html
 import time
 import logging
+import shutil
+import itertools
 import mimetypes
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Any, BinaryIO, Dict, Hashable, List, Optional, Tuple, Union
 
 import requests
-from markdownify import markdownify
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 
 from ws_manager import open_tab
 from config import config
 from utils.functions_metadata import function_schema
 
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
 
 logger = logging.getLogger("brave_search_community")
 
 
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer from the environment, falling back to `default`."""
+    try:
+        return max(int(os.getenv(name, default)), 1)
+    except (TypeError, ValueError):
+        logger.warning("Invalid %s '%s' supplied, defaulting to %s.", name, os.getenv(name), default)
+        return default
+
+
+# Maximum number of image downloads in flight per image search
+_DOWNLOAD_WORKERS = _env_int("BRAVE_DL_THREADS", 8)
+
+# Global cap on concurrent image downloads across all searches
+_DL_SEM = threading.BoundedSemaphore(_env_int("BRAVE_DL_CONCURRENCY", 10))
+
+# Per-host download rate (requests/second) and retry policy for 429/503 responses
+_HOST_RATE = 5.0
+_DL_MAX_ATTEMPTS = 3
+_DL_BACKOFF_BASE = 1.0  # seconds
+_DL_BACKOFF_MAX = 30.0  # seconds
+
+# Block size used when streaming image bodies to disk
+_COPY_BUFFER = 1 << 20
+
+# Brave snippets are tiny inline-HTML fragments; strip tags instead of a full
+# markdownify parse unless bold/italic preservation is requested.
+_TAG_RE = re.compile(r"<[^>]+>")
+_SNIPPET_FULL_MARKDOWN = os.getenv("BRAVE_SNIPPET_FULL_MARKDOWN") == "1"
+
+# Anything but alphanumerics and "-. _()[]{}" is dropped from saved file names
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w\-. ()\[\]{}]+")
+
+# Parsed Brave responses are reused for identical queries within this window
+_CACHE_MAXSIZE = 512
+_CACHE_TTL = 600  # seconds
+
+
+class _HostRateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per second to one host."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class _TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after insertion."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_RESPONSE_CACHE = _TTLCache(_CACHE_MAXSIZE, _CACHE_TTL)
+
+# Keep-alive sessions so repeated calls reuse TCP/TLS connections: one for the
+# Brave API, one for image CDNs with a pool large enough for concurrent downloads.
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "Accept": "application/json",
+    "User-Agent": "MageLab-Community-Tool/1.0",
+})
+
+_IMG_SESSION = requests.Session()
+_IMG_ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+_IMG_SESSION.mount("http://", _IMG_ADAPTER)
+_IMG_SESSION.mount("https://", _IMG_ADAPTER)
+
+_HOST_LIMITERS: Dict[str, _HostRateLimiter] = {}
+_HOST_LIMITERS_LOCK = threading.Lock()
+
+
+def _host_limiter(host: str) -> _HostRateLimiter:
+    with _HOST_LIMITERS_LOCK:
+        limiter = _HOST_LIMITERS.get(host)
+        if limiter is None:
+            limiter = _HOST_LIMITERS[host] = _HostRateLimiter(_HOST_RATE)
+        return limiter
+
+
 class BraveSearchException(Exception):
     """Raised when the Brave Search API returns a non-success response."""
 
@@ -47,24 +180,29 @@ def _normalize_api_key(value: Optional[str]) -> Optional[str]:
     return key or None
 
 
-def _get_api_key(explicit_key: Optional[str]) -> str:
-    """Return Brave API key from param or env vars.
+@lru_cache(maxsize=4)
+def _resolved_key(explicit_key: Optional[str]) -> Tuple[str, str]:
+    """Resolve and memoize (source, key) for `explicit_key` or the env vars.
 
     Checks `BRAVE_SEARCH_API_KEY` first, then `BRAVE_API_KEY` for convenience.
+    A missing key raises and is therefore never cached; call
+    `_resolved_key.cache_clear()` to pick up changed env vars.
     """
-    raw = explicit_key or os.getenv("BRAVE_SEARCH_API_KEY") or os.getenv("BRAVE_API_KEY")
+    if explicit_key:
+        source, raw = "param", explicit_key
+    elif os.getenv("BRAVE_SEARCH_API_KEY"):
+        source, raw = "BRAVE_SEARCH_API_KEY", os.getenv("BRAVE_SEARCH_API_KEY")
+    elif os.getenv("BRAVE_API_KEY"):
+        source, raw = "BRAVE_API_KEY", os.getenv("BRAVE_API_KEY")
+    else:
+        source, raw = "unknown", None
     key = _normalize_api_key(raw) or ""
     if not key:
         raise BraveSearchException(
             "Missing Brave API key. Set BRAVE_SEARCH_API_KEY (or BRAVE_API_KEY) or pass brave_api_key."
         )
-    # Masked debug log to confirm key source and presence
-    try:
-        source = (
-            "param"
-            if explicit_key
-            else ("BRAVE_SEARCH_API_KEY" if os.getenv("BRAVE_SEARCH_API_KEY") else ("BRAVE_API_KEY" if os.getenv("BRAVE_API_KEY") else "unknown"))
-        )
+    # Masked debug log to confirm key source and presence (once per resolution)
+    if logger.isEnabledFor(logging.INFO):
         masked_tail = key[-4:] if len(key) >= 4 else key
         logger.info(
             "brave_search_community: using key source=%s len=%s tail=%s",
@@ -72,20 +210,183 @@ def _get_api_key(explicit_key: Optional[str]) -> str:
             len(key),
             ("*" * (len(key) - len(masked_tail))) + masked_tail,
         )
-    except Exception:
+    return source, key
+
+
+def _get_api_key(explicit_key: Optional[str]) -> str:
+    """Return Brave API key from param or env vars."""
+    return _resolved_key(explicit_key)[1]
+
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
         pass
-    return key
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fetch_image(image_url: str) -> requests.Response:
+    """GET an image (streamed), honouring the per-host rate limit.
+
+    429/503 responses are retried with exponential backoff, using the server's
+    Retry-After hint when present. The last response is returned as-is.
+    """
+    limiter = _host_limiter(urlparse(image_url).netloc)
+    attempt = 1
+    while True:
+        limiter.acquire()
+        resp = _IMG_SESSION.get(image_url, timeout=15, stream=True)
+        if resp.status_code not in (429, 503) or attempt >= _DL_MAX_ATTEMPTS:
+            return resp
+        delay = _retry_after_seconds(resp)
+        if delay is None:
+            delay = _DL_BACKOFF_BASE * 2 ** (attempt - 1)
+        delay = min(delay, _DL_BACKOFF_MAX)
+        resp.close()
+        logger.warning(
+            "brave_search_community: image host returned %s for %s; retrying in %.1fs",
+            resp.status_code, image_url, delay,
+        )
+        time.sleep(delay)
+        attempt += 1
+
+
+def _snippet_text(snippet_html: str) -> str:
+    if _SNIPPET_FULL_MARKDOWN:
+        from markdownify import markdownify
+
+        return markdownify(snippet_html, heading_style="ATX").strip()
+    return html.unescape(_TAG_RE.sub("", snippet_html)).strip()
 
 
 def _format_web_results(results: List[Dict]) -> str:
-    def _fmt(res: Dict) -> str:
-        title = res.get("title", "No title")
-        snippet_html = res.get("description", "No snippet")
-        snippet_markdown = markdownify(snippet_html, heading_style="ATX").strip()
-        url = res.get("url", "No URL")
-        return f"Title: {title}\nSnippet: {snippet_markdown}\nURL: {url}"
+    # Build one flat list of pieces and join once instead of nesting f-strings
+    parts: List[str] = []
+    append = parts.append
+    for i, res in enumerate(results):
+        if i:
+            append("\n\n")
+        append(f"Result {i + 1}:\nTitle: ")
+        append(str(res.get("title", "No title")))
+        append("\nSnippet: ")
+        append(_snippet_text(res.get("description", "No snippet")))
+        append("\nURL: ")
+        append(str(res.get("url", "No URL")))
+    return "".join(parts)
 
-    return "\n\n".join(f"Result {i + 1}:\n{_fmt(res)}" for i, res in enumerate(results))
+
+def _safe_filename(name: str) -> str:
+    return _UNSAFE_FILENAME_RE.sub("", name).strip() or "image"
+
+
+# Suffix seed for colliding file names; shared so retries never restart at 1
+_NAME_COUNTER = itertools.count(1)
+_OPEN_UNIQUE_ATTEMPTS = 64
+
+
+def _open_unique(base_dir: Path, stem: str, ext: str) -> Tuple[Path, BinaryIO]:
+    """Atomically create a new file in base_dir and return (path, binary writer).
+
+    Tries `stem + ext` first, then `stem_<n> + ext`. O_CREAT|O_EXCL makes the
+    existence test and creation one syscall, so concurrent downloads cannot collide.
+    """
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    name = f"{stem}{ext}"
+    for _ in range(_OPEN_UNIQUE_ATTEMPTS):
+        candidate = base_dir / name
+        try:
+            fd = os.open(candidate, flags, 0o644)
+        except FileExistsError:
+            name = f"{stem}_{next(_NAME_COUNTER)}{ext}"
+            continue
+        return candidate, os.fdopen(fd, "wb", buffering=_COPY_BUFFER)
+    raise FileExistsError(f"Could not find a free file name for {stem}{ext} in {base_dir}")
+
+
+def _download_image(image_url: str, title: str, temp_dir: Path) -> Path:
+    """Fetch one image into temp_dir and return the saved path."""
+    parsed = urlparse(image_url)
+    url_name = os.path.basename(parsed.path) or ""
+    stem, ext = os.path.splitext(url_name)
+    stem = _safe_filename(stem or title)
+    with _DL_SEM:
+        # Fetch image (streamed)
+        # Closing the response releases its pooled connection on every path
+        with _fetch_image(image_url) as resp:
+            resp.raise_for_status()
+            # Infer missing extension from content-type
+            if not ext:
+                ct = resp.headers.get("Content-Type", "").split(";")[0].strip()
+                guessed = mimetypes.guess_extension(ct) if ct else None
+                ext = guessed or ".jpg"
+            dest_path, f = _open_unique(temp_dir, stem, ext)
+            # Copy the raw stream in large blocks rather than per-chunk Python writes
+            resp.raw.decode_content = True
+            try:
+                with f:
+                    shutil.copyfileobj(resp.raw, f, length=_COPY_BUFFER)
+            except BaseException:
+                # Do not leave a truncated image behind
+                dest_path.unlink(missing_ok=True)
+                raise
+    return dest_path
+
+
+def _download_and_format(res: Dict, temp_dir: Path, workspace_dir: Path) -> Dict:
+    """Download one image result and return its display fields.
+
+    Runs on a worker thread and touches no shared state, so results can be
+    collected with ThreadPoolExecutor.map. `failed` is set when the download failed.
+    """
+    title = res.get("title") or res.get("page_title") or "No title"
+    # Prefer original image via properties.url; fallback to thumbnail.src and others
+    props = res.get("properties") if isinstance(res.get("properties"), dict) else {}
+    thumb = res.get("thumbnail") if isinstance(res.get("thumbnail"), dict) else None
+    image_url = (
+        (props.get("url") if props else None)
+        or (thumb.get("src") if isinstance(thumb, dict) else None)
+        or res.get("image_url")
+        or res.get("image")
+        or res.get("thumbnail")
+        or ""
+    )
+    page_url = (
+        res.get("page_url")
+        or res.get("url")
+        or res.get("link")
+        or res.get("source")
+        or res.get("site")
+        or ""
+    )
+
+    rendered = {
+        "title": title,
+        "image_url": image_url,
+        "page_url": page_url,
+        "saved_path": None,
+        "saved_path_display": None,
+        "failed": False,
+    }
+    if image_url:
+        try:
+            dest_path = _download_image(image_url, title, temp_dir)
+            rendered["saved_path"] = str(dest_path)
+            try:
+                rendered["saved_path_display"] = str(dest_path.relative_to(workspace_dir))
+            except Exception:
+                rendered["saved_path_display"] = str(dest_path)
+        except Exception:
+            rendered["failed"] = True
+            logger.exception("Failed to download or save image %s", image_url)
+    return rendered
 
 
 def _format_image_results(results: List[Dict]) -> str:
@@ -99,93 +400,35 @@ def _format_image_results(results: List[Dict]) -> str:
     except Exception:
         logger.exception("Failed to ensure temp directory at %s", temp_dir)
 
+    # Downloads are I/O-bound, so overlap them on a thread pool; map keeps result order
+    with ThreadPoolExecutor(max_workers=_DOWNLOAD_WORKERS) as pool:
+        rendered = list(pool.map(lambda res: _download_and_format(res, temp_dir, workspace_dir), results))
+
     opened_tabs: List[str] = []
     failed_tabs: List[str] = []
-
-    def _safe_filename(name: str) -> str:
-        keep = "-. _()[]{}"
-        return "".join(c for c in name if c.isalnum() or c in keep).strip() or "image"
-
-    def _unique_path(base_dir: Path, stem: str, ext: str) -> Path:
-        candidate = base_dir / f"{stem}{ext}"
-        if not candidate.exists():
-            return candidate
-        i = 1
-        while True:
-            candidate = base_dir / f"{stem}_{i}{ext}"
-            if not candidate.exists():
-                return candidate
-            i += 1
-
-    def _fmt(res: Dict) -> str:
-        title = res.get("title") or res.get("page_title") or "No title"
-        # Prefer original image via properties.url; fallback to thumbnail.src and others
-        props = res.get("properties") if isinstance(res.get("properties"), dict) else {}
-        thumb = res.get("thumbnail") if isinstance(res.get("thumbnail"), dict) else None
-        image_url = (
-            (props.get("url") if props else None)
-            or (thumb.get("src") if isinstance(thumb, dict) else None)
-            or res.get("image_url")
-            or res.get("image")
-            or res.get("thumbnail")
-            or ""
-        )
-        page_url = (
-            res.get("page_url")
-            or res.get("url")
-            or res.get("link")
-            or res.get("source")
-            or res.get("site")
-            or ""
-        )
-
-        saved_path_display = None
-        # Attempt to download image and open locally
-        if image_url:
+    parts: List[str] = []
+    append = parts.append
+    for i, item in enumerate(rendered):
+        if item["failed"]:
+            failed_tabs.append(item["image_url"])
+        elif item["saved_path"]:
+            # Open in a new tab
             try:
-                parsed = urlparse(image_url)
-                url_name = os.path.basename(parsed.path) or ""
-                stem, ext = os.path.splitext(url_name)
-                if not stem:
-                    stem = _safe_filename(title) or "image"
-                # Fetch image (streamed)
-                resp = requests.get(image_url, timeout=15, stream=True)
-                resp.raise_for_status()
-                # Infer missing extension from content-type
-                if not ext:
-                    ct = resp.headers.get("Content-Type", "").split(";")[0].strip()
-                    guessed = mimetypes.guess_extension(ct) if ct else None
-                    ext = guessed or ".jpg"
-                dest_path = _unique_path(temp_dir, _safe_filename(stem), ext)
-                with open(dest_path, "wb") as f:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                # Open in a new tab
-                try:
-                    open_tab(str(dest_path))
-                    opened_tabs.append(str(dest_path))
-                except Exception:
-                    failed_tabs.append(image_url)
-                    logger.exception("Failed to open saved image tab for %s", dest_path)
-                try:
-                    saved_path_display = str(dest_path.relative_to(workspace_dir))
-                except Exception:
-                    saved_path_display = str(dest_path)
+                open_tab(item["saved_path"])
+                opened_tabs.append(item["saved_path"])
             except Exception:
-                failed_tabs.append(image_url)
-                logger.exception("Failed to download or save image %s", image_url)
-
-        parts = [f"Title: {title}"]
-        if image_url:
-            parts.append(f"Source: {image_url}")
-        if page_url:
-            parts.append(f"Page: {page_url}")
-        if saved_path_display:
-            parts.append(f"Saved: {saved_path_display}")
-        return "\n".join(parts)
-
-    body = "\n\n".join(f"Image {i + 1}:\n{_fmt(res)}" for i, res in enumerate(results))
+                failed_tabs.append(item["image_url"])
+                logger.exception("Failed to open saved image tab for %s", item["saved_path"])
+
+        if i:
+            append("\n\n")
+        append(f"Image {i + 1}:\nTitle: {item['title']}")
+        if item["image_url"]:
+            append(f"\nSource: {item['image_url']}")
+        if item["page_url"]:
+            append(f"\nPage: {item['page_url']}")
+        if item["saved_path_display"]:
+            append(f"\nSaved: {item['saved_path_display']}")
 
     # Append open status summary for the model
     summary_lines: List[str] = []
@@ -196,27 +439,22 @@ def _format_image_results(results: List[Dict]) -> str:
         more = "" if len(failed_tabs) <= 5 else f" (+{len(failed_tabs) - 5} more)"
         summary_lines.append(f"Failed to open: {len(failed_tabs)} — {preview}{more}")
     if summary_lines:
-        body = body + "\n\n" + "\n".join(summary_lines)
-    return body
+        append("\n\n")
+        append("\n".join(summary_lines))
+    return "".join(parts)
 
 
 def _brave_request(endpoint: str, params: Dict[str, Union[str, int]], api_key: str, timeout: int = 15) -> requests.Response:
-    headers = {
-        "Accept": "application/json",
-        "User-Agent": "MageLab-Community-Tool/1.0",
-        "X-Subscription-Token": api_key,
-    }
-    try:
-        safe_params = {k: v for k, v in params.items() if k != "q"}
+    headers = {"X-Subscription-Token": api_key}
+    # Skip building the redacted params dict when INFO logging is off
+    if logger.isEnabledFor(logging.INFO):
         logger.info(
             "brave_search_community: GET %s token_present=%s params=%s",
             endpoint,
             bool(api_key),
-            safe_params,
+            {k: v for k, v in params.items() if k != "q"},
         )
-    except Exception:
-        pass
-    return requests.get(endpoint, headers=headers, params=params, timeout=timeout)
+    return _SESSION.get(endpoint, headers=headers, params=params, timeout=timeout)
 
 
 def _handle_response(resp: requests.Response, kind: str) -> Dict:
@@ -225,11 +463,29 @@ def _handle_response(resp: requests.Response, kind: str) -> Dict:
     if not resp.ok:
         raise BraveSearchException(f"Brave {kind} search error {resp.status_code}: {resp.text}")
     try:
-        return resp.json()
+        # orjson.JSONDecodeError subclasses ValueError, like json's
+        return _loads(resp.content)
     except ValueError:
         raise BraveSearchException("Invalid JSON received from Brave Search")
 
 
+def _brave_fetch_cached(endpoint: str, query: str, count: int, api_key: str, kind: str) -> Dict:
+    """Return the parsed Brave response for (endpoint, query, count), cached with a TTL.
+
+    Only successful responses are cached; rate-limit and error responses raise
+    from `_handle_response` and are retried fresh on the next call.
+    """
+    key = (endpoint, query, count)
+    data = _RESPONSE_CACHE.get(key)
+    if data is not None:
+        logger.info("brave_search_community: cache hit for %s count=%s", endpoint, count)
+        return data
+    resp = _brave_request(endpoint, {"q": query, "count": count}, api_key)
+    data = _handle_response(resp, kind)
+    _RESPONSE_CACHE.set(key, data)
+    return data
+
+
 @function_schema(
     name="search_web_community",
     description="Look up things on the web using Brave Search",
@@ -242,7 +498,7 @@ def search_web_community(
     brave_api_key: Optional[str] = None,
 ) -> str:
     """
-    Perform a Brave Search web query and return formatted top results with Markdown snippets.
+    Perform a Brave Search web query and return formatted top results with plain-text snippets.
 
     :param query: Search query string
     :param num_results: Number of results to return (default 1)
@@ -257,12 +513,13 @@ def search_web_community(
 
     while attempts < max_attempts:
         try:
-            resp = _brave_request(
+            data = _brave_fetch_cached(
                 "https://api.search.brave.com/res/v1/web/search",
-                {"q": query, "count": num_results},
+                query,
+                num_results,
                 api_key,
+                "web",
             )
-            data = _handle_response(resp, "web")
             results = data.get("web", {}).get("results", [])
             if not results:
                 return "No results found."
@@ -324,12 +581,13 @@ def search_images_community(
 
     while attempts < max_attempts:
         try:
-            resp = _brave_request(
+            data = _brave_fetch_cached(
                 "https://api.search.brave.com/res/v1/images/search",
-                {"q": query, "count": num_results},
+                query,
+                num_results,
                 api_key,
+                "image",
             )
-            data = _handle_response(resp, "image")
             # Per Brave Images API, top-level key is typically 'results'.
             results = data.get("results") if isinstance(data.get("results"), list) else []
             # Backward compatibility: if 'images' wrapper is present, use its 'results'.
@@ -373,3 +631,8 @@ def search_images_community(
             )
 
     return "We could not retrieve results at this time. Please try again later."
+
+
+# Mirror functools.lru_cache so callers can drop cached Brave responses
+search_web_community.cache_clear = _RESPONSE_CACHE.clear
+search_images_community.cache_clear = _RESPONSE_CACHE.clear
@@ -1,15 +1,333 @@
+import io
 import os
 import re
-import glob
+import sys
+import heapq
+import fnmatch
+import functools
+import itertools
 import logging
+import threading
+import multiprocessing
+import importlib.machinery
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterable, Iterator, NamedTuple, Optional, List, Tuple, Union
 
 from utils.functions_metadata import function_schema
 from config import config
 
+try:
+    from re import _parser as _sre_parse, _constants as _sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+    import sre_constants as _sre_constants
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 logger = logging.getLogger(__name__)
 
+# Characters that make a path segment a wildcard pattern (same set glob uses)
+_MAGIC_RE = re.compile(r"[*?[]")
+
+# GrepTool hands a batch of paths to the shared worker pool only when the files
+# hold enough bytes to repay the round trip; smaller searches stay serial.
+# Paths are submitted in batches so max_results can stop the scan early.
+_PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+_GREP_BATCH_SIZE = 512
+_GREP_CHUNKSIZE = 32
+_GREP_MAX_WORKERS = min(os.cpu_count() or 1, 8)
+
+# Files up to this size are matched as one buffer; larger ones are streamed per line
+_GREP_MAX_BULK_BYTES = 64 * 1024 * 1024
+
+# A buffer search that keeps finding hits its line regex rejects (typically a
+# negated class running on to a far terminator) can turn quadratic; past either
+# limit the file is rescanned line by line instead
+_MAX_REJECTED_HITS = 32
+_MAX_SCAN_FACTOR = 4
+
+# Shorter required literals are not selective enough to be worth a prefilter pass
+_MIN_PREFILTER_BYTES = 3
+
+# Like `grep -I`, files with a NUL byte in their first block are treated as binary
+_BINARY_SNIFF_BYTES = 4096
+
+# Syntax Python and PCRE read differently: `{,n}` is a repeat in Python but
+# literal text in PCRE, and `[:...:]` is a POSIX class only in PCRE
+_HYPERSCAN_UNSAFE_RE = re.compile(r"\{,|\[:")
+
+# Directories GrepTool prunes from the walk unless `exclude_dirs` overrides them
+_DEFAULT_EXCLUDE_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv"})
+
+
+class _GrepMatchers(NamedTuple):
+    """The search pattern compiled for each way GrepTool scans a file.
+
+    `line` decides what matches; the buffer forms only find candidate lines and
+    are None when the pattern must be matched line by line.
+    """
+    line: "re.Pattern[str]"
+    text: Optional["re.Pattern[str]"]
+    ascii: Optional["re.Pattern[bytes]"]
+    hyperscan: Optional["hyperscan.Database"] = None
+    literal: Optional[bytes] = None
+
+
+def _required_literal(pattern: str) -> Optional[bytes]:
+    """Return the longest literal run every match of `pattern` must contain, UTF-8 encoded.
+
+    Only top-level literal runs are considered, since groups, repeats and
+    alternations may be skipped by a match. Returns None for case-insensitive
+    patterns or when no run of at least _MIN_PREFILTER_BYTES exists.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+
+    best, run = "", []
+    for op, arg in list(parsed) + [(None, None)]:
+        if op is _sre_constants.LITERAL:
+            run.append(chr(arg))
+            continue
+        candidate = "".join(run)
+        if len(candidate.encode("utf-8")) > len(best.encode("utf-8")):
+            best = candidate
+        run = []
+
+    # U+FFFD may come from decoding invalid bytes, so it cannot be found in raw data
+    literal = best.encode("utf-8")
+    if len(literal) < _MIN_PREFILTER_BYTES or "\ufffd" in best:
+        return None
+    return literal
+
+
+def _matches_newline(op, arg, dotall: bool) -> bool:
+    """Return whether the single-character node (op, arg) can match "\\n"."""
+    C = _sre_constants
+    if op is C.LITERAL:
+        return arg == 10
+    if op is C.NOT_LITERAL:
+        return arg != 10
+    if op is C.ANY:
+        return dotall
+    if op is C.IN:
+        hit, negate = False, False
+        for item_op, item_arg in arg:
+            if item_op is C.NEGATE:
+                negate = True
+            elif item_op is C.LITERAL:
+                hit = hit or item_arg == 10
+            elif item_op is C.RANGE:
+                hit = hit or item_arg[0] <= 10 <= item_arg[1]
+            elif item_op is C.CATEGORY:
+                hit = hit or item_arg in (C.CATEGORY_SPACE, C.CATEGORY_NOT_DIGIT, C.CATEGORY_NOT_WORD)
+        return hit != negate
+    return False
+
+
+def _flatten_nodes(parsed) -> List[Tuple]:
+    """Return every (op, arg) node in a parsed pattern, including nested ones."""
+    nodes, stack = [], [parsed]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _sre_parse.SubPattern):
+            nodes.extend(node)
+            stack.extend(arg for _op, arg in node)
+        elif isinstance(node, (tuple, list)):
+            stack.extend(node)
+    return nodes
+
+
+def _buffer_searchable(pattern: str) -> bool:
+    """Return whether searching a whole buffer finds every line `pattern` matches on its own.
+
+    Anchors to the start or end of the string, \\B, negative lookarounds, a '$'
+    that may follow a consumed newline, and zero-width matches that can sit just
+    after a newline (a multiline '^', or a lookbehind that can see "\\n") match
+    a lone line differently from the same text inside a buffer, so patterns
+    using them are matched line by line.
+    """
+    C = _sre_constants
+    parsed = _sre_parse.parse(pattern)
+    nodes = _flatten_nodes(parsed)
+
+    line_only = (C.AT_BEGINNING_STRING, C.AT_END_STRING, C.AT_NON_BOUNDARY)
+    if any(op is C.ASSERT_NOT or (op is C.AT and arg in line_only) for op, arg in nodes):
+        return False
+    # Scoped (?s:...) and (?m:...) groups are treated as if the flag applied throughout
+    flags = parsed.state.flags
+    for op, arg in nodes:
+        if op is C.SUBPATTERN:
+            flags |= arg[1]
+    dotall = bool(flags & re.DOTALL)
+    if flags & re.MULTILINE and any(op is C.AT and arg is C.AT_BEGINNING for op, arg in nodes):
+        return False
+    for op, arg in nodes:
+        if op is C.ASSERT and arg[0] < 0 and any(
+            _matches_newline(sub_op, sub_arg, dotall)
+            for sub_op, sub_arg in _flatten_nodes(arg[1])
+        ):
+            return False
+    if any(op is C.AT and arg is C.AT_END for op, arg in nodes):
+        return not any(_matches_newline(op, arg, dotall) for op, arg in nodes)
+    return True
+
+
+def _compile_grep(pattern: str) -> _GrepMatchers:
+    """Compile `pattern` for per-line, whole-text and raw-bytes scanning.
+
+    The buffer forms are only kept when _buffer_searchable allows them, and the
+    bytes form only for ASCII patterns, where it matches ASCII files exactly like
+    the str form; when python-hyperscan is installed it is also compiled to a
+    Hyperscan database if Hyperscan supports the pattern.
+    Raises re.error for an invalid pattern.
+    """
+    line = re.compile(pattern)
+    if not _buffer_searchable(pattern):
+        return _GrepMatchers(line, None, None, None, _required_literal(pattern))
+    text = re.compile(pattern, re.MULTILINE)
+    ascii = None
+    if pattern.isascii():
+        try:
+            ascii = re.compile(pattern.encode("ascii"), re.MULTILINE)
+        except re.error:
+            # e.g. \u or \N{...} escapes, which bytes patterns do not support
+            pass
+    database = None
+    # Hyperscan only reports where matches end, which cannot place an empty match
+    # on its line, so patterns that can match empty text stay on `re`
+    if (ascii is not None and hyperscan is not None
+            and not _HYPERSCAN_UNSAFE_RE.search(pattern)
+            and _sre_parse.parse(pattern).getwidth()[0] > 0):
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[ascii.pattern],
+                ids=[0],
+                flags=[hyperscan.HS_FLAG_MULTILINE]
+            )
+        except hyperscan.error as hs_err:
+            # Back-references, lookarounds etc.: stay on `re`
+            logger.debug(f"GrepTool: Hyperscan cannot compile pattern ({hs_err}); using re")
+            database = None
+    return _GrepMatchers(line, text, ascii, database, _required_literal(pattern))
+
+
+# Shared grep worker pool, started on first use by _get_pool
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+# Whether worker processes can import this module, probed once by _pool_available
+_POOL_AVAILABLE: Optional[bool] = None
+
+
+def _compile_fnmatch(pattern: str) -> "re.Pattern[str]":
+    """Translate a shell-style pattern to a regex once, honouring the OS case rules like fnmatch."""
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile(fnmatch.translate(pattern), flags)
+
+
+def _scandir(dirname: str) -> List[os.DirEntry]:
+    """List a directory, treating unreadable or missing directories as empty."""
+    try:
+        with os.scandir(dirname) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def _mtime(path: str, entry: Optional[os.DirEntry] = None) -> Optional[float]:
+    """Return the mtime of `path` (reusing `entry` when given), or None if it vanished."""
+    try:
+        return (entry.stat() if entry is not None else os.stat(path)).st_mtime
+    except OSError:
+        return None
+
+
+def _rscan_dirs(dirname: str) -> Iterator[str]:
+    """Yield every non-hidden directory below `dirname`, depth first, without following symlinks."""
+    for entry in _scandir(dirname):
+        if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+            yield entry.path
+            yield from _rscan_dirs(entry.path)
+
+
+def _scan_glob(dirname: str, segments: List[str], matchers: List) -> Iterator[Tuple[str, float]]:
+    """Yield (path, mtime) for entries below `dirname` matching the glob `segments`.
+
+    Mirrors glob.glob(recursive=True): '**' spans zero or more directories and
+    wildcards skip dot-files unless the segment itself starts with '.'.
+    `matchers` holds the precompiled regex for each wildcard segment (None otherwise).
+    """
+    segment, matcher = segments[0], matchers[0]
+    last = len(segments) == 1
+
+    if segment == "**":
+        if last:
+            # Everything below dirname, plus dirname itself (as glob does)
+            root = os.path.join(dirname, "")
+            mtime = _mtime(root)
+            if mtime is not None:
+                yield root, mtime
+            for sub in [dirname, *_rscan_dirs(dirname)]:
+                for entry in _scandir(sub):
+                    if not entry.name.startswith("."):
+                        mtime = _mtime(entry.path, entry)
+                        if mtime is not None:
+                            yield entry.path, mtime
+        else:
+            for sub in [dirname, *_rscan_dirs(dirname)]:
+                yield from _scan_glob(sub, segments[1:], matchers[1:])
+    elif matcher is None:
+        path = os.path.join(dirname, segment)
+        if not last:
+            if os.path.isdir(path):
+                yield from _scan_glob(path, segments[1:], matchers[1:])
+        else:
+            mtime = _mtime(path)
+            if mtime is not None:
+                yield path, mtime
+    else:
+        include_hidden = segment.startswith(".")
+        for entry in _scandir(dirname):
+            if entry.name.startswith(".") and not include_hidden:
+                continue
+            if not matcher.match(entry.name):
+                continue
+            if not last:
+                if entry.is_dir():
+                    yield from _scan_glob(entry.path, segments[1:], matchers[1:])
+            else:
+                mtime = _mtime(entry.path, entry)
+                if mtime is not None:
+                    yield entry.path, mtime
+
+
+def _iter_glob(full_pattern: str) -> Iterator[Tuple[str, float]]:
+    """Yield (path, mtime) for every path matching `full_pattern` using os.scandir."""
+    parts = full_pattern.split(os.sep)
+    first_magic = next((i for i, part in enumerate(parts) if _MAGIC_RE.search(part)), None)
+    if first_magic is None:
+        mtime = _mtime(full_pattern)
+        if mtime is not None:
+            yield full_pattern, mtime
+        return
+    root = os.sep.join(parts[:first_magic]) or os.sep
+    segments = parts[first_magic:]
+    matchers = [
+        _compile_fnmatch(seg) if seg != "**" and _MAGIC_RE.search(seg) else None
+        for seg in segments
+    ]
+    yield from _scan_glob(root, segments, matchers)
+
 
 @function_schema(
     name="GlobTool",
@@ -65,24 +383,21 @@ def GlobTool(
 
         logger.info(f"GlobTool: Searching for pattern '{pattern}' in '{search_path}'")
 
-        # Construct the full glob pattern
+        # Construct the full glob pattern and walk it with os.scandir, which
+        # yields each path together with its mtime from the directory entry
         full_pattern = str(search_path / pattern)
-        matches: List[str] = glob.glob(full_pattern, recursive=True)
+        matches: List[Tuple[str, float]] = list(_iter_glob(full_pattern))
 
         if not matches:
             logger.info("GlobTool: No matching files found.")
             return ""
 
-        # Sort by modification time descending (newest first)
-        matches_sorted = sorted(
-            matches,
-            key=lambda filepath: Path(filepath).stat().st_mtime,
-            reverse=True
-        )
-
-        # Apply max_results limit
+        # Newest first; with a max_results limit only the top K are kept (O(N log K))
         if max_results is not None and isinstance(max_results, int) and max_results > 0:
-            matches_sorted = matches_sorted[:max_results]
+            newest = heapq.nlargest(max_results, matches, key=itemgetter(1))
+        else:
+            newest = sorted(matches, key=itemgetter(1), reverse=True)
+        matches_sorted = [filepath for filepath, _ in newest]
 
         return "\n".join(matches_sorted)
 
@@ -91,18 +406,308 @@ def GlobTool(
         return f"Error: {str(e)}"
 
 
+def _line_matches(line_regex: "re.Pattern[str]", line: Union[str, bytes]) -> bool:
+    """Return whether `line`, including its newline, matches like a line read in text mode."""
+    if isinstance(line, bytes):
+        line = line.decode("ascii")
+    return line_regex.search(line) is not None
+
+
+def _match_lines(
+    regex: "re.Pattern",
+    line_regex: "re.Pattern[str]",
+    data: Union[str, bytes],
+    newline: Union[str, bytes]
+) -> List[int]:
+    """Return the 1-based numbers of lines in `data` that contain a match of `line_regex`.
+
+    Searches the whole buffer with `regex` to find candidate lines and confirms
+    each with `line_regex`, so a hit spanning several lines never counts. After
+    each candidate the search jumps to the next line, since a rejected line has
+    no match at all. Newlines are only counted between hits. Falls back to
+    _scan_lines once rejected hits exceed _MAX_REJECTED_HITS or the hits have
+    spanned _MAX_SCAN_FACTOR times the buffer.
+    """
+    line_numbers: List[int] = []
+    end = len(data)
+    lineno, counted, pos = 1, 0, 0
+    rejected, scanned = 0, 0
+    while pos <= end:
+        match = regex.search(data, pos)
+        if match is None:
+            break
+        start = match.start()
+        scanned += match.end() - pos
+        # An empty match after the final newline is not on a real line
+        if start == end and (end == 0 or data[-1:] == newline):
+            break
+        line_start = data.rfind(newline, 0, start) + 1
+        next_newline = data.find(newline, start)
+        line_end = end if next_newline == -1 else next_newline + 1
+        if not _line_matches(line_regex, data[line_start:line_end]):
+            rejected += 1
+            if rejected > _MAX_REJECTED_HITS or scanned > _MAX_SCAN_FACTOR * end:
+                text = data.decode("ascii") if isinstance(data, bytes) else data
+                return _scan_lines(line_regex, text)
+            pos = line_end
+            continue
+        lineno += data.count(newline, counted, start)
+        counted = start
+        line_numbers.append(lineno)
+        if next_newline == -1:
+            break
+        pos = line_end
+    return line_numbers
+
+
+def _scan_lines(line_regex: "re.Pattern[str]", text: str) -> List[int]:
+    """Return the 1-based numbers of lines in `text` that match `line_regex`, one line at a time."""
+    lines = text.split("\n")
+    # Text after the final newline; empty when the file ends with one
+    last = lines.pop()
+    numbered = [line + "\n" for line in lines]
+    if last:
+        numbered.append(last)
+    return [
+        lineno for lineno, line in enumerate(numbered, start=1)
+        if line_regex.search(line)
+    ]
+
+
+def _hyperscan_lines(
+    database: "hyperscan.Database",
+    line_regex: "re.Pattern[str]",
+    data: bytes
+) -> List[int]:
+    """Return the 1-based numbers of lines in `data` that contain a match of `line_regex`.
+
+    Hyperscan reports the end of every match, so the line holding each match's
+    last byte is a candidate; candidates are confirmed with `line_regex` since
+    Hyperscan matches may span lines or differ from Python's regex semantics.
+    """
+    ends = set()
+
+    def on_match(_id, _start, end, _flags, _context):
+        ends.add(end)
+
+    database.scan(data, match_event_handler=on_match)
+
+    line_numbers: List[int] = []
+    lineno, counted, checked = 1, 0, 0
+    for end in sorted(ends):
+        last = end - 1
+        lineno += data.count(b"\n", counted, last)
+        counted = last
+        if lineno == checked:
+            continue
+        checked = lineno
+        line_start = data.rfind(b"\n", 0, last) + 1
+        next_newline = data.find(b"\n", last)
+        line_end = len(data) if next_newline == -1 else next_newline + 1
+        if _line_matches(line_regex, data[line_start:line_end]):
+            line_numbers.append(lineno)
+    return line_numbers
+
+
+def _grep_one_file(
+    file_path: str,
+    matchers: _GrepMatchers
+) -> Tuple[str, List[int], Optional[str]]:
+    """Return (file_path, matching line numbers, read error) for a single file.
+
+    Binary files yield no matches. Read errors are returned rather than raised
+    so one bad file never aborts a batch.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(_BINARY_SNIFF_BYTES)
+            if b"\x00" in head:
+                return file_path, [], None
+            if os.fstat(f.fileno()).st_size > _GREP_MAX_BULK_BYTES:
+                f.seek(0)
+                text_file = io.TextIOWrapper(f, encoding='utf-8', errors='replace')
+                return file_path, [
+                    lineno for lineno, line in enumerate(text_file, start=1)
+                    if matchers.line.search(line)
+                ], None
+            data = head + f.read()
+    except (UnicodeDecodeError, OSError) as file_err:
+        return file_path, [], str(file_err)
+
+    # Match the universal-newline line numbering of text mode
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    # Files without the pattern's required literal cannot match; bytes.find runs in C
+    if matchers.literal is not None and data.find(matchers.literal) == -1:
+        return file_path, [], None
+    if matchers.ascii is not None and data.isascii():
+        if matchers.hyperscan is not None:
+            return file_path, _hyperscan_lines(matchers.hyperscan, matchers.line, data), None
+        return file_path, _match_lines(matchers.ascii, matchers.line, data, b"\n"), None
+    text = data.decode('utf-8', errors='replace')
+    if matchers.text is None:
+        return file_path, _scan_lines(matchers.line, text), None
+    return file_path, _match_lines(matchers.text, matchers.line, text, "\n"), None
+
+
+def _iter_candidates(
+    base_path: Path,
+    include_re: Optional["re.Pattern[str]"],
+    max_files: Optional[int],
+    skip_dirs: frozenset
+) -> Iterator[str]:
+    """Lazily yield files below `base_path` whose names match `include_re`, in os.walk order.
+
+    Directories named in `skip_dirs` are pruned before descending, and the walk
+    stops as soon as `max_files` files have been yielded.
+    """
+    if max_files is not None and max_files <= 0:
+        return
+    count = 0
+    for root, dirs, files in os.walk(base_path):
+        dirs[:] = [d for d in dirs if d not in skip_dirs]
+        for filename in files:
+            if include_re is not None and not include_re.match(filename):
+                continue
+            yield os.path.join(root, filename)
+            count += 1
+            if max_files is not None and count >= max_files:
+                logger.info(f"GrepTool: Reached max_files limit ({max_files}). Stopping scan.")
+                return
+
+
+def _pool_available() -> bool:
+    """Return whether GrepTool can scan in worker processes, probing only once.
+
+    Workers re-import this module by name to run _grep_one_file, which fails in
+    frozen apps and when the host loaded this file from outside sys.path.
+    """
+    global _POOL_AVAILABLE
+    if _POOL_AVAILABLE is None:
+        available = False
+        if not getattr(sys, "frozen", False):
+            try:
+                spec = importlib.machinery.PathFinder.find_spec(__name__.partition(".")[0])
+                available = spec is not None and (
+                    "." in __name__
+                    or (spec.origin is not None and os.path.samefile(spec.origin, __file__))
+                )
+            except (ImportError, ValueError, OSError):
+                available = False
+        if not available:
+            logger.debug(f"GrepTool: Module '{__name__}' is not importable by worker processes; scanning serially")
+        _POOL_AVAILABLE = available
+    return _POOL_AVAILABLE
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared grep worker pool, starting it on first use.
+
+    Workers are spawned rather than forked, since forking the threaded host
+    app can deadlock, and are reused across calls to amortize their start-up.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=_GREP_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a failed worker pool so the next parallel search starts a fresh one."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@functools.lru_cache(maxsize=8)
+def _worker_matchers(pattern: str) -> _GrepMatchers:
+    """Compile `pattern` once per worker process."""
+    return _compile_grep(pattern)
+
+
+def _grep_file_in_worker(file_path: str, pattern: str) -> Tuple[str, List[int], Optional[str]]:
+    """Run _grep_one_file in a pool worker, which receives the pattern with each task."""
+    return _grep_one_file(file_path, _worker_matchers(pattern))
+
+
+def _batch_bytes(batch: List[str]) -> int:
+    """Return the total size of the files in `batch`, counting unreadable ones as empty."""
+    total = 0
+    for file_path in batch:
+        try:
+            total += os.stat(file_path).st_size
+        except OSError:
+            pass
+    return total
+
+
+def _grep_files(
+    paths: Iterable[str],
+    pattern: str,
+    matchers: _GrepMatchers
+) -> Iterator[Tuple[str, List[int], Optional[str]]]:
+    """Yield _grep_one_file results for `paths` in order, in worker processes when worthwhile.
+
+    `paths` is consumed one batch at a time, so when the caller stops early the
+    rest of the directory walk never happens. Batches under _PARALLEL_MIN_BYTES
+    are scanned serially; if the pool fails, the rest of the search is too.
+    """
+    paths = iter(paths)
+    parallel = _GREP_MAX_WORKERS >= 2 and _pool_available()
+    while True:
+        batch = list(itertools.islice(paths, _GREP_BATCH_SIZE))
+        if not batch:
+            return
+        if not parallel or _batch_bytes(batch) < _PARALLEL_MIN_BYTES:
+            for file_path in batch:
+                yield _grep_one_file(file_path, matchers)
+            continue
+
+        done = 0
+        pool = None
+        chunksize = max(1, min(_GREP_CHUNKSIZE, len(batch) // (_GREP_MAX_WORKERS * 4)))
+        try:
+            pool = _get_pool()
+            results = pool.map(
+                _grep_file_in_worker, batch, itertools.repeat(pattern), chunksize=chunksize
+            )
+            try:
+                for result in results:
+                    done += 1
+                    yield result
+            finally:
+                # Cancels whatever is still queued if the caller stopped early
+                results.close()
+        except Exception as pool_err:
+            # Per-file errors are returned, so anything raised here is the pool itself
+            # (e.g. processes unavailable or the module not importable in workers).
+            logger.debug(f"GrepTool: Process pool unavailable ({pool_err}); scanning serially")
+            if pool is not None:
+                _discard_pool(pool)
+            parallel = False
+            for file_path in batch[done:]:
+                yield _grep_one_file(file_path, matchers)
+
+
 @function_schema(
     name="GrepTool",
     description="Search file contents using regular expressions.",
     required_params=["pattern"],
-    optional_params=["include", "path", "max_results", "max_files"]
+    optional_params=["include", "path", "max_results", "max_files", "exclude_dirs"]
 )
 def GrepTool(
     pattern: str,
     include: Optional[str] = None,
     path: Optional[str] = None,
     max_results: Optional[int] = 1000,
-    max_files: Optional[int] = None
+    max_files: Optional[int] = None,
+    exclude_dirs: Optional[Union[str, List[str]]] = None
 ) -> str:
     """
     Search files for lines matching a given regular expression.
@@ -114,6 +719,11 @@ def GrepTool(
         path (str, optional): Directory path to search in. Defaults to config.workspace_path if not provided.
         max_results (int, optional): Maximum number of total match-lines to return. Defaults to 1000.
         max_files (int, optional): Maximum number of files to scan. If None, scans all files.
+        exclude_dirs (str or list, optional): Directory names to skip (list or comma-separated).
+                                              Defaults to .git, node_modules, __pycache__ and .venv;
+                                              an empty list or string skips no directories.
+
+    Binary files (a NUL byte in the first 4 KiB) are skipped.
 
     Returns:
         - Newline-separated string of matches in the form "file_path: line <lineno>",
@@ -122,8 +732,6 @@ def GrepTool(
     Raises:
         ValueError: If `pattern` is empty or if `path` does not exist / is not a directory.
     """
-    import fnmatch
-
     # Input validation
     if not pattern:
         error_msg = "Pattern must be a non-empty string."
@@ -140,6 +748,12 @@ def GrepTool(
             max_files = int(max_files)
         except ValueError:
             logger.warning(f"GrepTool: Could not convert max_files '{max_files}' to int; using original value")
+    if exclude_dirs is None:
+        skip_dirs = _DEFAULT_EXCLUDE_DIRS
+    else:
+        if isinstance(exclude_dirs, str):
+            exclude_dirs = [d.strip() for d in exclude_dirs.split(",")]
+        skip_dirs = frozenset(d for d in exclude_dirs if d)
 
     try:
         # Resolve base path
@@ -161,64 +775,34 @@ def GrepTool(
 
         # Pre-compile the regular expression for performance
         try:
-            regex = re.compile(pattern)
+            matchers = _compile_grep(pattern)
         except re.error as compile_err:
             error_msg = f"Invalid regex pattern: {compile_err}"
             logger.error(error_msg)
             raise ValueError(error_msg)
 
-        results: List[str] = []
-        files_scanned = 0
-        matches_found = 0
-
-        # Walk through the directory tree
-        for root, dirs, files in os.walk(base_path):
-            for filename in files:
-                # If max_files is set and we've scanned enough, break out
-                if max_files is not None and files_scanned >= max_files:
-                    logger.info(f"GrepTool: Reached max_files limit ({max_files}). Stopping scan.")
-                    break
+        # Translate the include glob once rather than per file
+        include_re = _compile_fnmatch(include) if include else None
 
-                if include and not fnmatch.fnmatch(filename, include):
-                    continue
-
-                file_path = Path(root) / filename
-                files_scanned += 1
-
-                try:
-                    with file_path.open('r', encoding='utf-8', errors='replace') as f:
-                        for lineno, line in enumerate(f, start=1):
-                            if regex.search(line):
-                                match_info = f"{str(file_path)}: line {lineno}"
-                                results.append(match_info)
-                                matches_found += 1
-
-                                # If we've collected enough matches, stop entirely
-                                if max_results is not None and matches_found >= max_results:
-                                    logger.info(
-                                        f"GrepTool: Reached max_results limit ({max_results})."
-                                    )
-                                    break
-
-                        # If we hit max_results inside this file, break out of file loop
-                        if max_results is not None and matches_found >= max_results:
-                            break
-
-                except (UnicodeDecodeError, PermissionError) as file_err:
-                    logger.warning(
-                        f"GrepTool: Skipping file '{file_path}' due to read error: {file_err}"
-                    )
-                    continue
-
-                # Check again if max_results reached after finishing a file
-                if max_results is not None and matches_found >= max_results:
+        # Walk, filter and scan as one lazy pipeline that stops at max_results
+        candidates = _iter_candidates(base_path, include_re, max_files, skip_dirs)
+
+        results: List[str] = []
+        for file_path, line_numbers, read_error in _grep_files(candidates, pattern, matchers):
+            if read_error is not None:
+                logger.warning(
+                    f"GrepTool: Skipping file '{file_path}' due to read error: {read_error}"
+                )
+                continue
+
+            for lineno in line_numbers:
+                results.append(f"{file_path}: line {lineno}")
+                if max_results is not None and len(results) >= max_results:
                     break
 
-            # Check if max_files or max_results reached to break out of the directory walk
-            if (
-                (max_files is not None and files_scanned >= max_files) or
-                (max_results is not None and matches_found >= max_results)
-            ):
+            # If we've collected enough matches, stop entirely
+            if max_results is not None and len(results) >= max_results:
+                logger.info(f"GrepTool: Reached max_results limit ({max_results}).")
                 break
 
         if not results:
@@ -0,0 +1,310 @@
+import glob
+import os
+import sys
+import time
+import types
+from pathlib import Path
+
+import pytest
+
+# GrepGlob imports these modules from the mage lab app; stand in for them here
+_functions_metadata = types.ModuleType("utils.functions_metadata")
+_functions_metadata.function_schema = lambda **_kwargs: (lambda func: func)
+_utils = types.ModuleType("utils")
+_utils.functions_metadata = _functions_metadata
+_config = types.ModuleType("config")
+_config.config = types.SimpleNamespace(workspace_path=".")
+sys.modules.setdefault("utils", _utils)
+sys.modules.setdefault("utils.functions_metadata", _functions_metadata)
+sys.modules.setdefault("config", _config)
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import GrepGlob  # noqa: E402
+from GrepGlob import GrepTool, _compile_grep, _grep_one_file, _iter_glob, _required_literal  # noqa: E402
+
+
+def _grep(tmp_path, pattern, content, name="f.txt"):
+    file_path = tmp_path / name
+    file_path.write_bytes(content.encode("utf-8") if isinstance(content, str) else content)
+    return _grep_one_file(str(file_path), _compile_grep(pattern))[1]
+
+
+def _grep_per_line(tmp_path, pattern, content, monkeypatch):
+    """Grep with the streaming path used for files over the bulk size limit."""
+    monkeypatch.setattr(GrepGlob, "_GREP_MAX_BULK_BYTES", 0)
+    return _grep(tmp_path, pattern, content, name="big.txt")
+
+
+# ---------------------------------------------------------------------------
+# Glob walking matches glob.glob(recursive=True)
+# ---------------------------------------------------------------------------
+
+def _make_tree(root):
+    for rel in ("a.py", ".hidden.py", "notes.txt", "src/x.py", "src/sub/y.py",
+                "src/sub/deep/z.py", "src/.dot/w.py", "docs/readme.md", ".cfg/c.txt"):
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text("x\n", encoding="utf-8")
+    return root
+
+
+def _glob_both(root, pattern):
+    full_pattern = str(root / pattern)
+    ours = sorted(p for p, _ in _iter_glob(full_pattern))
+    return ours, sorted(glob.glob(full_pattern, recursive=True))
+
+
+@pytest.mark.parametrize("pattern", [
+    "*.py", "**", "**/", "**/*.py", "**/.*", ".*", "src/*/", "s?c/*.py", "[sd]*/*",
+    "src/sub/y.py", "missing/nothing.py",
+])
+def test_iter_glob_matches_glob(tmp_path, pattern):
+    ours, expected = _glob_both(_make_tree(tmp_path), pattern)
+    assert ours == expected
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks unavailable")
+def test_iter_glob_symlink_differences(tmp_path):
+    root = _make_tree(tmp_path)
+    try:
+        os.symlink(root / "src", root / "linked", target_is_directory=True)
+        os.symlink(root / "gone", root / "dangling")
+    except OSError:
+        pytest.skip("cannot create symlinks")
+    ours, expected = _glob_both(root, "**/*.py")
+    # '**' does not descend into symlinked directories, unlike glob
+    assert ours == [p for p in expected if not p.startswith(str(root / "linked") + os.sep)]
+    assert ours != expected
+    # A dangling link has no mtime to sort by, so it is left out
+    ours, expected = _glob_both(root, "*")
+    assert str(root / "dangling") in expected
+    assert ours == [p for p in expected if p != str(root / "dangling")]
+
+
+# ---------------------------------------------------------------------------
+# Matches never span lines
+# ---------------------------------------------------------------------------
+
+def test_quoted_string_only_on_its_own_line(tmp_path):
+    assert _grep(tmp_path, r'"[^"]*"', 'x = "abc\ny = 1\nz = "q"\n') == [3]
+
+
+def test_whitespace_does_not_cross_newline(tmp_path):
+    assert _grep(tmp_path, r"foo\s+bar", "foo\nbar\n") == []
+
+
+def test_whitespace_within_line(tmp_path):
+    assert _grep(tmp_path, r"foo\s+bar", "foo\nfoo  bar\n") == [2]
+
+
+def test_rejected_hit_does_not_hide_later_match_on_same_line(tmp_path):
+    assert _grep(tmp_path, r"a[^b]*b", "a\naxb\n") == [2]
+
+
+def test_trailing_newline_is_part_of_the_line(tmp_path):
+    assert _grep(tmp_path, r"x\n", "x\ny") == [1]
+
+
+# ---------------------------------------------------------------------------
+# String anchors apply to each line
+# ---------------------------------------------------------------------------
+
+def test_start_anchor_matches_every_line(tmp_path):
+    content = "import os\nx = 1\nimport re\n"
+    assert _grep(tmp_path, r"\Aimport", content) == [1, 3]
+
+
+def test_end_anchor_is_after_the_newline(tmp_path):
+    # As in text mode, each line still ends with "\n" when \Z is tested
+    assert _grep(tmp_path, r"foo\Z", "foo\nbar foo") == [2]
+
+
+def test_dollar_after_newline(tmp_path):
+    assert _grep(tmp_path, r"\s+$", "a\nb \nc") == [1, 2]
+
+
+def test_negative_lookbehind_at_line_start(tmp_path):
+    assert _grep(tmp_path, r"(?<!\s)foo", "x\nfoo\n x foo\n") == [2]
+
+
+# ---------------------------------------------------------------------------
+# Line endings and empty matches
+# ---------------------------------------------------------------------------
+
+def test_crlf_line_numbers(tmp_path):
+    assert _grep(tmp_path, r"b$", "a\r\nb\r\nc\rb\n") == [2, 4]
+
+
+def test_empty_match_on_every_line(tmp_path):
+    assert _grep(tmp_path, r"", "a\n\nb\n") == [1, 2, 3]
+
+
+def test_empty_match_without_trailing_newline(tmp_path):
+    assert _grep(tmp_path, r"x*", "a\nb") == [1, 2]
+
+
+def test_empty_line_pattern(tmp_path):
+    assert _grep(tmp_path, r"^$", "a\n\nb\n") == [2]
+
+
+def test_empty_file(tmp_path):
+    assert _grep(tmp_path, r"", "") == []
+
+
+def test_binary_file_skipped(tmp_path):
+    assert _grep(tmp_path, r"a", b"a\x00a\n") == []
+
+
+# ---------------------------------------------------------------------------
+# Buffer and streaming scans agree
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("pattern", [
+    r'"[^"]*"', r"foo\s+bar", r"\Aimport", r"foo\Z", r"\s+$", r"^$", r"", r"é+", r"(?s)o.b",
+])
+def test_bulk_and_streaming_agree(tmp_path, monkeypatch, pattern):
+    content = 'import "x\nfoo\nbar "y"\r\n\nfoo  bar é\nimport foo'
+    bulk = _grep(tmp_path, pattern, content)
+    assert _grep_per_line(tmp_path, pattern, content, monkeypatch) == bulk
+
+
+@pytest.mark.parametrize("pattern, content, expected", [
+    # Zero-width matches just after a newline belong to the line that newline ends
+    (r"(?m)^$", "a\nb\n", [1, 2]),
+    (r"(?<=\n)", "a\nb\n", [1, 2]),
+    (r"(?<=:\n)", "key:\nvalue\n", [1]),
+])
+def test_bulk_and_streaming_agree_after_newline(tmp_path, monkeypatch, pattern, content, expected):
+    assert _grep(tmp_path, pattern, content) == expected
+    assert _grep_per_line(tmp_path, pattern, content, monkeypatch) == expected
+
+
+@pytest.mark.parametrize("pattern, content", [
+    (r"<[^>]*>", "<p x\n" * 64000 + ">\n"),
+    (r"a[^b]*b", "a\n" * 64000 + "b\n"),
+])
+def test_rejected_cross_line_hits_stay_linear(tmp_path, pattern, content):
+    # Each retry used to rescan to the far terminator, taking seconds here
+    started = time.perf_counter()
+    assert _grep(tmp_path, pattern, content) == []
+    assert time.perf_counter() - started < 1.0
+
+
+# ---------------------------------------------------------------------------
+# Required-literal prefilter
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"def foo\s*\(", b"def foo"),
+    (r"(?i)abc", None),
+    (r"ab", None),
+    (r"abc|abd", None),
+    (r"a(bcd)?", None),
+])
+def test_required_literal(pattern, expected):
+    assert _required_literal(pattern) == expected
+
+
+def test_prefilter_skips_only_files_without_literal(tmp_path):
+    matchers = _compile_grep(r"def foo\s*\(")
+    assert matchers.literal == b"def foo"
+    without = tmp_path / "without.py"
+    without.write_text("def bar(\ndef  foo(\n", encoding="utf-8")
+    with_literal = tmp_path / "with.py"
+    with_literal.write_text("x = 1\ndef foo (\n", encoding="utf-8")
+    assert _grep_one_file(str(without), matchers)[1] == []
+    assert _grep_one_file(str(with_literal), matchers)[1] == [2]
+
+
+# ---------------------------------------------------------------------------
+# Hyperscan candidates are confirmed like re hits
+# ---------------------------------------------------------------------------
+
+def test_hyperscan_is_used_for_plain_patterns():
+    pytest.importorskip("hyperscan")
+    assert _compile_grep(r"foo\s+bar").hyperscan is not None
+
+
+@pytest.mark.parametrize("pattern, content, expected", [
+    (r"foo\s+bar", "foo\nbar\nfoo bar\n", [3]),
+    (r'"[^"]*"', 'x = "abc\ny = 1\nz = "q"\n', [3]),
+    (r"foo\Z", "foo\nfoo", [2]),
+    (r"xa{,3}y", "xa{,3}y\nxaay\n", [2]),
+    (r"b\n", "ab\nb", [1]),
+    (r"^$", "a\n\nb\n", [2]),
+])
+def test_hyperscan_matches_re(tmp_path, pattern, content, expected):
+    pytest.importorskip("hyperscan")
+    assert _grep(tmp_path, pattern, content) == expected
+
+
+# ---------------------------------------------------------------------------
+# Worker process availability
+# ---------------------------------------------------------------------------
+
+def test_pool_available_when_importable(monkeypatch):
+    monkeypatch.setattr(GrepGlob, "_POOL_AVAILABLE", None)
+    assert GrepGlob._pool_available() is True
+
+
+def test_pool_unavailable_when_frozen(monkeypatch):
+    monkeypatch.setattr(GrepGlob, "_POOL_AVAILABLE", None)
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+    assert GrepGlob._pool_available() is False
+
+
+def _fail_get_pool():
+    raise OSError("no processes")
+
+
+def test_small_searches_stay_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(GrepGlob, "_POOL_AVAILABLE", True)
+    monkeypatch.setattr(GrepGlob, "_GREP_MAX_WORKERS", 4)
+    monkeypatch.setattr(GrepGlob, "_get_pool", lambda: pytest.fail("pool started"))
+    for i in range(200):
+        (tmp_path / f"f{i}.py").write_text("x\nreturn 1\n", encoding="utf-8")
+    assert len(GrepTool("return", path=str(tmp_path)).splitlines()) == 200
+
+
+def test_pool_failure_falls_back_to_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(GrepGlob, "_POOL_AVAILABLE", True)
+    monkeypatch.setattr(GrepGlob, "_GREP_MAX_WORKERS", 4)
+    monkeypatch.setattr(GrepGlob, "_PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(GrepGlob, "_get_pool", _fail_get_pool)
+    for i in range(20):
+        (tmp_path / f"f{i}.py").write_text("x\nreturn 1\n", encoding="utf-8")
+    assert len(GrepTool("return", path=str(tmp_path)).splitlines()) == 20
+
+
+def test_worker_task_matches_serial_scan(tmp_path):
+    file_path = tmp_path / "a.py"
+    file_path.write_text("x\nreturn 1\n", encoding="utf-8")
+    expected = _grep_one_file(str(file_path), _compile_grep("return"))
+    assert GrepGlob._grep_file_in_worker(str(file_path), "return") == expected
+
+
+# ---------------------------------------------------------------------------
+# GrepTool
+# ---------------------------------------------------------------------------
+
+def test_greptool_reports_confirmed_lines(tmp_path):
+    (tmp_path / "a.py").write_text('s = "x\nt = "y"\n', encoding="utf-8")
+    result = GrepTool(r'"[^"]*"', path=str(tmp_path))
+    assert result == f"{tmp_path / 'a.py'}: line 2"
+
+
+def test_greptool_invalid_regex(tmp_path):
+    assert GrepTool("(", path=str(tmp_path)).startswith("Error: Invalid regex pattern")
+
+
+@pytest.mark.parametrize("exclude_dirs, expected", [
+    (None, ["src"]),
+    ([], ["node_modules", "src"]),
+    ("", ["node_modules", "src"]),
+    ("src", ["node_modules"]),
+])
+def test_greptool_exclude_dirs(tmp_path, exclude_dirs, expected):
+    for name in ("node_modules", "src"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "a.txt").write_text("hit\n", encoding="utf-8")
+    result = GrepTool("hit", path=str(tmp_path), exclude_dirs=exclude_dirs)
+    assert sorted(Path(line.split(": ")[0]).parent.name for line in result.splitlines()) == expected